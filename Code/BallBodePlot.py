@@ -1,10 +1,18 @@
+from Code.Common.DynamicalSystem import default_figures_dir
 from Code.Common.LinearSystem import LinearSystem
 import numpy as np
 import matplotlib.pyplot as plt
 import control as ctrl
+import os
 
 
-if __name__ == '__main__':
+def bode_plot(figures_dir=default_figures_dir, show=True):
+    """
+    Function to produce the Bode plot of the linear system
+    :param figures_dir: The directory where the figure will be saved
+    :param show: Boolean to represent if the graph is to be displayed
+    :return: None
+    """
     ball = LinearSystem()
 
     # Transfer function
@@ -15,5 +23,12 @@ if __name__ == '__main__':
     f = np.logspace(-1, 3, 1000)
     w = 2 * np.pi * f
     bode_plot = ctrl.bode(G_x, w, dB=True, Hz=True, deg=True)  # Produce the bode plot of G_x against w
-    plt.savefig('.\\Figures\\bode_plot.svg')  # Save the graph as an .svg
-    plt.show()  # Display the bode plot
+    plt.savefig(os.path.join(figures_dir, 'bode_plot.svg'))  # Save the graph as an .svg
+    if show:
+        plt.show()  # Display the bode plot
+    else:
+        plt.close()  # Close the bode plot without displaying it
+
+
+if __name__ == '__main__':
+    bode_plot()
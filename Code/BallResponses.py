@@ -1,10 +1,18 @@
+from Code.Common.DynamicalSystem import default_figures_dir
 from Code.Common.LinearSystem import LinearSystem
 import numpy as np
 from control import impulse_response as ir
 from control import step_response as sr
+import os
 
 
-if __name__ == '__main__':
+def ball_responses(figures_dir=default_figures_dir, show=True):
+    """
+    Function to plot the impulse and step responses of the linear system
+    :param figures_dir: The directory where the figures will be saved
+    :param show: Boolean to represent if the graphs are to be displayed
+    :return: None
+    """
     dt = 1  # Time for the simulation of the system in seconds
     num_points = 1001  # Resolution of the graph
 
@@ -19,7 +27,13 @@ if __name__ == '__main__':
     # Plot graphs for the impulse and step responses
     ball.plotter(t_imp,
                  ball_imp,
-                 file_path='.\\Figures\\impulse_response.svg')  # Impulse, x position of the ball against time
+                 file_path=os.path.join(figures_dir, 'impulse_response.svg'),
+                 show=show)  # Impulse, x position of the ball against time
     ball.plotter(t_step,
                  ball_step,
-                 file_path='.\\Figures\\step_response.svg')  # Step, x position of the ball against time
+                 file_path=os.path.join(figures_dir, 'step_response.svg'),
+                 show=show)  # Step, x position of the ball against time
+
+
+if __name__ == '__main__':
+    ball_responses()
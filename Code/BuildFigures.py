@@ -0,0 +1,169 @@
+from Code.Common.DynamicalSystem import default_figures_dir
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import hashlib
+import importlib
+import json
+import os
+
+code_dir = os.path.dirname(os.path.abspath(__file__))  # Directory containing the analysis scripts
+
+# Source files of the Common package which the analysis scripts depend on
+dynamical_system = ['Common/DynamicalSystem.py']
+linear_system = dynamical_system + ['Common/LinearSystem.py', 'Common/StateSpace.py']
+nonlinear_system = dynamical_system + ['Common/NonlinearSystem.py']
+pid_controller = ['Common/PidController.py', 'Common/StateSpace.py']
+
+# Dictionary of every task which produces figures, mapping the name of the task to the following;
+#     function: The module and function which produce the figures
+#     figures: The file names of the figures produced
+#     inputs: The source files which the figures depend on, relative to the Code directory
+#     nested_pool: Optional, True if the function starts its own process pool, which is given the cores left over by
+#         the other tasks
+figure_tasks = {
+    'bode_plot': {
+        'function': ('Code.BallBodePlot', 'bode_plot'),
+        'figures': ['bode_plot.svg'],
+        'inputs': ['BallBodePlot.py'] + linear_system
+    },
+    'ball_responses': {
+        'function': ('Code.BallResponses', 'ball_responses'),
+        'figures': ['impulse_response.svg', 'step_response.svg'],
+        'inputs': ['BallResponses.py'] + linear_system
+    },
+    'complete_system': {
+        'function': ('Code.CompleteSystem', 'complete_system'),
+        'figures': ['system_responses.svg'],
+        'inputs': ['CompleteSystem.py', 'Common/Routh.py'] + linear_system + pid_controller
+    },
+    'good_controller': {
+        'function': ('Code.GoodController', 'good_controller'),
+        'figures': ['pid_controlled_system.svg'],
+        'inputs': ['GoodController.py', 'Common/Export.py'] + linear_system + pid_controller
+    },
+    'linear_vs_nonlinear': {
+        'function': ('Code.LinearVsNonlinear', 'linear_vs_nonlinear'),
+        'figures': ['linear_system.svg', 'nonlinear_system.svg'],
+        'inputs': ['LinearVsNonlinear.py'] + linear_system + nonlinear_system
+    },
+    'region_of_attraction': {
+        'function': ('Code.RegionOfAttractionMap', 'region_of_attraction'),
+        'figures': ['region_of_attraction_open_loop.svg', 'region_of_attraction_pid_controlled.svg'],
+        'inputs': ['RegionOfAttractionMap.py', 'Common/RegionOfAttraction.py']
+        + linear_system + nonlinear_system + pid_controller,
+        'nested_pool': True
+    },
+    'determine_x_star_e': {
+        'function': ('Code.DetermineXStarE', 'determine_x_star_e'),
+        'figures': ['ve_against_x1e.svg'],
+        'inputs': ['DetermineXStarE.py'] + dynamical_system
+    }
+}
+
+manifest_name = '.figures.json'  # File in the figures directory recording the inputs of each task
+
+
+def input_hash(name):
+    """
+    Function to calculate a hash of all the source files which the figures of a task depend on
+    :param name: The name of the task
+    :return: The hash as a hexadecimal string
+    """
+    digest = hashlib.sha256()
+    for path in sorted(set(figure_tasks[name]['inputs'])):
+        digest.update(path.encode())
+        with open(os.path.join(code_dir, path), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def run_task(name, figures_dir, workers=1):
+    """
+    Function to produce the figures of a task without displaying them, intended to be run in a worker process
+    :param name: The name of the task
+    :param figures_dir: The directory where the figures will be saved
+    :param workers: The number of processes for a task which starts its own process pool
+    :return: The name of the task
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Non-interactive backend, so that no windows are opened
+
+    arguments = {'workers': workers} if figure_tasks[name].get('nested_pool', False) else {}
+
+    module, function = figure_tasks[name]['function']
+    getattr(importlib.import_module(module), function)(figures_dir=figures_dir, show=False, **arguments)
+    return name
+
+
+def build_figures(figures_dir=default_figures_dir, tasks=None, force=False, workers=None):
+    """
+    Function to produce the figures of every task in parallel, skipping tasks whose inputs have not changed
+    :param figures_dir: The directory where the figures will be saved
+    :param tasks: The names of the tasks to be run, all tasks if None
+    :param force: Boolean to represent if tasks are to be run even when their inputs have not changed
+    :param workers: The number of processes to use, all cores if None
+    :return: The names of the tasks which were run
+    """
+    os.makedirs(figures_dir, exist_ok=True)
+    manifest_path = os.path.join(figures_dir, manifest_name)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+
+    # Determine which tasks are out of date
+    hashes = {name: input_hash(name) for name in (figure_tasks if tasks is None else tasks)}
+    stale = [name for name, digest in hashes.items()
+             if force
+             or manifest.get(name) != digest
+             or not all(os.path.exists(os.path.join(figures_dir, figure)) for figure in figure_tasks[name]['figures'])]
+
+    # A task with a process pool of its own is submitted first, since it takes the longest, and is given every core
+    # which is not needed by the other tasks, so that the cores are shared rather than oversubscribed
+    stale.sort(key=lambda name: not figure_tasks[name].get('nested_pool', False))
+    nested_workers = max(1, (workers or os.cpu_count() or 1) - (len(stale) - 1))
+
+    # Run the independent tasks in a process pool, recording each task in the manifest as soon as it has finished,
+    # so that a task which fails does not cause the tasks which succeeded to be run again
+    failures = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_task, name, figures_dir, nested_workers): name for name in stale}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                except Exception as error:
+                    failures[name] = error
+                    print('Failed ' + ', '.join(figure_tasks[name]['figures']) + ': ' + repr(error))
+                    continue
+                manifest[name] = hashes[name]
+                print('Built ' + ', '.join(figure_tasks[name]['figures']))
+    finally:
+        with open(manifest_path, 'w') as file:
+            json.dump(manifest, file, indent=4, sort_keys=True)
+
+    for name in hashes:
+        if name not in stale:
+            print('Skipped ' + ', '.join(figure_tasks[name]['figures']) + ' (inputs unchanged)')
+    if failures:
+        raise RuntimeError('Failed to build the tasks ' + ', '.join(failures)) from next(iter(failures.values()))
+    return stale
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Regenerate the figures of every analysis script.')
+    parser.add_argument('--output', default=default_figures_dir,
+                        help='directory where the figures are saved, e.g. Report/Figures')
+    parser.add_argument('--force', action='store_true', help='rebuild figures even if their inputs are unchanged')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes, all cores by default')
+    parser.add_argument('tasks', nargs='*', help='tasks to be run, out of ' + ', '.join(figure_tasks))
+    arguments = parser.parse_args()
+    for task in arguments.tasks:
+        if task not in figure_tasks:
+            parser.error('unknown task ' + task)
+
+    build_figures(figures_dir=arguments.output,
+                  tasks=arguments.tasks or None,
+                  force=arguments.force,
+                  workers=arguments.workers)
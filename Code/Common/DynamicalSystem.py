@@ -1,5 +1,9 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+
+# Directory where the figures are saved by default
+default_figures_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Figures')
 
 # Dictionary containing values for the dynamical system
 constants = {
@@ -98,9 +102,16 @@ class DynamicalSystem:
         """
         return self._v_e
 
+    def get_delta(self):
+        """
+        Getter for the value of the constant delta
+        :return: The constant delta
+        """
+        return self._delta
+
     @staticmethod
     def system_plotter(x_axis, y_axis, title=None, x_label=None, y_label=None, file_path=None,
-                       multiplot=False, labels=None, label_title=None, h_lines=None):
+                       multiplot=False, labels=None, label_title=None, h_lines=None, show=True):
         """
         Static method to plot a graph of x_1 (m) against time (s)
         :param x_axis: Values of time to be plotted on the x-axis
@@ -113,6 +124,7 @@ class DynamicalSystem:
         :param labels: The labels to be used in a legend
         :param label_title: The title of the legend
         :param h_lines: Horizontal lines to be drawn on the graph
+        :param show: Boolean to represent if the graph is to be displayed, otherwise it is closed once saved
         :return: None
         """
 
@@ -137,7 +149,10 @@ class DynamicalSystem:
         plt.ylabel(y_label)  # Label the y-axis
         plt.grid()  # Produces a grid on the graph
         plt.savefig(file_path)  # Save the graph
-        plt.show()  # Displays the graph
+        if show:
+            plt.show()  # Displays the graph
+        else:
+            plt.close()  # Closes the graph without displaying it
 
 
 if __name__ == '__main__':
@@ -0,0 +1,313 @@
+import numpy as np
+import glob
+import os
+import shutil
+import tempfile
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, the compressed NPZ format is used without it
+    pa = None
+    pq = None
+
+default_results_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Results')
+state_names = ('x_1', 'x_2', 'i')  # Names of the states in the solution of NonlinearSystem.move
+linear_state_names = ('x_1_bar', 'x_2_bar', 'i_bar')  # Names of the states in the solution of LinearSystem.move
+
+
+def results_path(name, results_dir=default_results_dir):
+    """
+    Function to choose where results are written, with the extension of the format used by ResultWriter by default
+    :param name: The name of the results
+    :param results_dir: The directory where the results will be saved
+    :return: The path of a Parquet file when pyarrow is available, otherwise of a directory of NPZ files
+    """
+    return os.path.join(results_dir, name + ('.parquet' if pq is not None else ''))
+
+
+def trajectory_columns(solution, run=0, names=state_names):
+    """
+    Function to convert the solution returned by LinearSystem.move or NonlinearSystem.move into columns
+    :param solution: The solution describing the system dynamics over time, with attributes t and y
+    :param run: An identifier of the simulation, so that many trajectories can be stored in one file
+    :param names: The names of the states, state_names or linear_state_names
+    :return: dictionary mapping the name of each column to its values, one row per point in time
+    """
+    columns = {
+        'run': np.full(len(solution.t), run),
+        't': np.asarray(solution.t, dtype=float)
+    }
+    for name, values in zip(names, solution.y):
+        columns[name] = np.asarray(values, dtype=float)
+    return columns
+
+
+def solver_columns(solution, run=0):
+    """
+    Function to convert the statistics of the solver which produced a solution into columns
+    :param solution: The solution describing the system dynamics over time, as returned by the move methods
+    :param run: An identifier of the simulation
+    :return: dictionary mapping the name of each column to its values, with a single row
+    """
+    return {
+        'run': np.array([run]),
+        'num_points': np.array([len(solution.t)]),
+        'nfev': np.array([solution.nfev]),
+        'njev': np.array([solution.njev]),
+        'nlu': np.array([solution.nlu]),
+        'status': np.array([solution.status]),
+        'success': np.array([solution.success])
+    }
+
+
+def closed_loop_columns(t_span, x_cache, run=0):
+    """
+    Function to convert the position recorded by a closed-loop simulation, as in GoodController.py, into columns
+    :param t_span: All values of time which were used for sampling
+    :param x_cache: The position of the ball at each sample
+    :param run: An identifier of the simulation
+    :return: dictionary mapping the name of each column to its values, one row per sample
+    """
+    t_span = np.asarray(t_span, dtype=float)
+    return {
+        'run': np.full(t_span.size, run),
+        't': t_span,
+        'x_1_bar': np.asarray(x_cache, dtype=float).reshape(-1)
+    }
+
+
+class ResultWriter:
+    """
+    Class to stream simulation results to disk in chunks of columns, as a Parquet file when pyarrow is available and
+    as a directory of compressed NPZ files otherwise
+    The chunks are written to a temporary path next to the results, which only replaces any previous results once the
+    writer is closed, so that results are never lost to a run which fails part of the way through
+    """
+
+    def __init__(self, path, file_format=None, chunk_size=100000):
+        """
+        Constructor for the ResultWriter class
+        :param path: The path of the Parquet file, or of the directory of NPZ files
+        :param file_format: Either 'parquet' or 'npz', 'parquet' if pyarrow is available when None
+        :param chunk_size: The number of rows buffered before a chunk is written
+        """
+        if file_format is None:
+            file_format = 'parquet' if pq is not None else 'npz'
+        if file_format not in ('parquet', 'npz'):
+            raise ValueError('The file format must be either parquet or npz')
+        if file_format == 'parquet' and pq is None:
+            raise ImportError('pyarrow is required to write Parquet files')
+
+        if file_format == 'npz' and os.path.exists(path) and (
+                not os.path.isdir(path)
+                or any(not name.startswith('chunk_') or not name.endswith('.npz') for name in os.listdir(path))):
+            raise FileExistsError('The path ' + path + ' exists and does not contain results of a ResultWriter')
+        if file_format == 'parquet' and os.path.isdir(path):
+            raise IsADirectoryError('The path ' + path + ' of the Parquet file is a directory')
+
+        self.__path = path
+        self.__format = file_format
+        self.__chunk_size = chunk_size
+
+        # Temporary path in the same directory as the results, so that it can be renamed to replace them
+        directory, name = os.path.split(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if file_format == 'npz':
+            self.__temporary_path = tempfile.mkdtemp(prefix='.' + name + '.', dir=directory)
+        else:
+            handle, self.__temporary_path = tempfile.mkstemp(prefix='.' + name + '.', dir=directory)
+            os.close(handle)
+
+        self.__dtypes = None  # Data type of each column, fixed by the first rows written
+        self.__buffer = []  # Columns which have not been written yet
+        self.__buffered_rows = 0
+        self.__chunks = 0  # Number of chunks written
+        self.__parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, columns):
+        """
+        Method to append rows to the results, which are written once a full chunk has been buffered
+        :param columns: dictionary mapping the name of each column to a one-dimensional array of its values
+        :return: None
+        """
+        columns = {name: np.asarray(values) for name, values in columns.items()}
+        lengths = {values.shape for values in columns.values()}
+        if len(lengths) != 1 or len(next(iter(lengths))) != 1:
+            raise ValueError('Every column must be a one-dimensional array of the same length')
+
+        if self.__dtypes is None:
+            self.__dtypes = {name: values.dtype for name, values in columns.items()}
+        elif set(columns) != set(self.__dtypes):
+            raise ValueError('The columns must be the same as those written previously')
+        else:
+            for name, dtype in self.__dtypes.items():
+                if not np.can_cast(columns[name].dtype, dtype, 'same_kind'):
+                    raise TypeError('The column ' + name + ' of type ' + str(columns[name].dtype)
+                                    + ' cannot be written as ' + str(dtype) + ', the type of the first rows written')
+
+        self.__buffer.append({name: columns[name].astype(dtype, copy=False) for name, dtype in self.__dtypes.items()})
+        self.__buffered_rows += next(iter(lengths))[0]
+        if self.__buffered_rows >= self.__chunk_size:
+            self.flush()
+
+    def write_stream(self, batches):
+        """
+        Generator to write each batch of a stream, such as Robustness.stream, and pass it on unchanged
+        :param batches: An iterable of dictionaries of columns
+        :return: Generator of the same batches, each of which has been written
+        """
+        for batch in batches:
+            self.write(batch)
+            yield batch
+
+    def flush(self):
+        """
+        Method to write any buffered rows as a chunk
+        :return: None
+        """
+        if not self.__buffered_rows:
+            return
+        chunk = {name: np.concatenate([columns[name] for columns in self.__buffer]) for name in self.__dtypes}
+        if self.__format == 'parquet':
+            table = pa.table(chunk)
+            if self.__parquet_writer is None:
+                self.__parquet_writer = pq.ParquetWriter(self.__temporary_path, table.schema, compression='zstd')
+            self.__parquet_writer.write_table(table)
+        else:
+            np.savez_compressed(os.path.join(self.__temporary_path, 'chunk_' + str(self.__chunks).zfill(6) + '.npz'),
+                                **chunk)
+        self.__chunks += 1
+        self.__buffer = []
+        self.__buffered_rows = 0
+
+    def close(self):
+        """
+        Method to write any buffered rows, close the file, and replace any previous results with the results written
+        :return: None
+        """
+        if self.__temporary_path is None:
+            return
+        self.flush()
+        if self.__parquet_writer is not None:
+            self.__parquet_writer.close()
+            self.__parquet_writer = None
+
+        if self.__format == 'parquet':
+            if self.__chunks:
+                os.replace(self.__temporary_path, self.__path)
+            else:
+                os.remove(self.__temporary_path)  # Without any rows there is no schema, so no file is written
+        else:
+            # A directory can only be renamed over an empty directory, so the previous chunks are removed first
+            if os.path.isdir(self.__path):
+                for old_chunk in glob.glob(os.path.join(self.__path, 'chunk_*.npz')):
+                    os.remove(old_chunk)
+                os.rmdir(self.__path)
+            os.rename(self.__temporary_path, self.__path)
+        self.__temporary_path = None
+
+    def abort(self):
+        """
+        Method to discard the results written, leaving any previous results unchanged
+        :return: None
+        """
+        if self.__temporary_path is None:
+            return
+        if self.__parquet_writer is not None:
+            self.__parquet_writer.close()
+            self.__parquet_writer = None
+        if self.__format == 'parquet':
+            os.remove(self.__temporary_path)
+        else:
+            shutil.rmtree(self.__temporary_path)
+        self.__temporary_path = None
+
+
+class ResultReader:
+    """
+    Class to read results written by ResultWriter without loading every chunk into memory at once
+    """
+
+    def __init__(self, path):
+        """
+        Constructor for the ResultReader class
+        :param path: The path of the Parquet file, or of the directory of NPZ files
+        """
+        self.__path = path
+        if os.path.isdir(path):
+            self.__format = 'npz'
+            self.__chunks = sorted(glob.glob(os.path.join(path, 'chunk_*.npz')))
+            self.__parquet_file = None
+        else:
+            if pq is None:
+                raise ImportError('pyarrow is required to read Parquet files')
+            self.__format = 'parquet'
+            self.__parquet_file = pq.ParquetFile(pa.memory_map(path))  # Memory-map the file rather than reading it
+
+    def get_columns(self):
+        """
+        Getter for the names of the columns
+        :return: A list of the names of the columns
+        """
+        if self.__format == 'parquet':
+            return self.__parquet_file.schema_arrow.names
+        if not self.__chunks:
+            return []
+        with np.load(self.__chunks[0]) as chunk:
+            return list(chunk.files)
+
+    def get_num_chunks(self):
+        """
+        Getter for the number of chunks
+        :return: The number of chunks
+        """
+        if self.__format == 'parquet':
+            return self.__parquet_file.num_row_groups
+        return len(self.__chunks)
+
+    def read_chunk(self, index, columns=None):
+        """
+        Method to read a single chunk
+        :param index: The index of the chunk
+        :param columns: The names of the columns to be read, all columns if None
+        :return: dictionary mapping the name of each column to its values
+        """
+        if self.__format == 'parquet':
+            table = self.__parquet_file.read_row_group(index, columns=columns)
+            return {name: table.column(name).to_numpy() for name in table.column_names}
+        with np.load(self.__chunks[index]) as chunk:
+            return {name: chunk[name] for name in (chunk.files if columns is None else columns)}
+
+    def iter_chunks(self, columns=None):
+        """
+        Generator to read the results one chunk at a time
+        :param columns: The names of the columns to be read, all columns if None
+        :return: Generator of dictionaries mapping the name of each column to its values
+        """
+        for index in range(self.get_num_chunks()):
+            yield self.read_chunk(index, columns)
+
+    def read(self, columns=None):
+        """
+        Method to read whole columns, which should be restricted to the columns needed for large results
+        :param columns: The names of the columns to be read, all columns if None
+        :return: dictionary mapping the name of each column to its values
+        """
+        chunks = list(self.iter_chunks(columns))
+        if not chunks:
+            return {name: np.empty(0) for name in (self.get_columns() if columns is None else columns)}
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+if __name__ == '__main__':
+    print('Please run a different source file.')
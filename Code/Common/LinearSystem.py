@@ -1,7 +1,7 @@
 from Code.Common.DynamicalSystem import DynamicalSystem
+from Code.Common.StateSpace import StateSpace
 from scipy.integrate import solve_ivp
 import numpy as np
-from control import TransferFunction as Tf
 
 
 class LinearSystem(DynamicalSystem):
@@ -9,15 +9,16 @@ class LinearSystem(DynamicalSystem):
     Class to define the linear system
     """
 
-    def __init__(self, x_1_bar=0., x_2_bar=0., i_bar=0., v_bar=0.):
+    def __init__(self, x_1_bar=0., x_2_bar=0., i_bar=0., v_bar=0., attributes=None):
         """
         Constructor for the linear system class
         :param x_1_bar: x position relative to the equilibrium x position
         :param x_2_bar: Speed of the ball relative to the equilibrium speed of the ball
         :param i_bar: Current relative to the equilibrium current
         :param v_bar: Input voltage relative to the equilibrium voltage
+        :param attributes: dictionary of the system constants, see DynamicalSystem
         """
-        super().__init__()  # Construct a dynamical system to inherit from
+        super().__init__(attributes)  # Construct a dynamical system to inherit from
 
         # Calculate constants used in the linear equations
         constant = 5. / (7. * self._mass)
@@ -73,12 +74,24 @@ class LinearSystem(DynamicalSystem):
         Method to calculate the value of the transfer function of the liinear system
         :return: The value of the transfer function
         """
+        from control import TransferFunction as Tf  # Only needed when round-tripping with python-control
         return Tf([self.__d * self.__n],
                   [1,
                    (self.__h + self.__p),
                    (self.__h * self.__p - self.__f),
                    -(self.__f * self.__p)])
 
+    def state_space(self):
+        """
+        Method to calculate the state-space model of the linear system, with x_1_bar as the output
+        :return: The StateSpace object of the linear system
+        """
+        return StateSpace([[0., 1., 0.],
+                           [self.__f, -self.__h, self.__d],
+                           [0., 0., -self.__p]],
+                          [[0.], [0.], [self.__n]],
+                          [[1., 0., 0.]])
+
     def get_x_1_bar(self):
         """
         Getter for the value of x_1_bar
@@ -88,7 +101,7 @@ class LinearSystem(DynamicalSystem):
 
     @staticmethod
     def plotter(x_axis, y_axis, title=None, file_path=None, multiplot=False, labels=None, label_title=None,
-                h_lines=None):
+                h_lines=None, show=True):
         """
         Static method to plot a graph of x_1_bar (m) against time (s)
         :param x_axis: Values of time to be plotted on the x-axis
@@ -99,6 +112,7 @@ class LinearSystem(DynamicalSystem):
         :param labels: The labels to be used in a legend
         :param label_title: The title of the legend
         :param h_lines: Horizontal lines to be drawn on the graph
+        :param show: Boolean to represent if the graph is to be displayed
         :return: None
         """
         super(LinearSystem, LinearSystem).system_plotter(x_axis,
@@ -110,7 +124,8 @@ class LinearSystem(DynamicalSystem):
                                                          multiplot=multiplot,
                                                          labels=labels,
                                                          label_title=label_title,
-                                                         h_lines=h_lines)
+                                                         h_lines=h_lines,
+                                                         show=show)
 
 
 if __name__ == '__main__':
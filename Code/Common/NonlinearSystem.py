@@ -1,22 +1,27 @@
 from Code.Common.DynamicalSystem import DynamicalSystem
 from scipy.integrate import solve_ivp
+from scipy.optimize import OptimizeResult
 import numpy as np
 
+# Integration methods which use a fixed number of steps, rather than an adaptive solver from scipy
+fixed_step_methods = ('RK4', 'semi-implicit')
+
 
 class NonlinearSystem(DynamicalSystem):
     """
     Class to define the non-linear system
     """
 
-    def __init__(self, states=None):
+    def __init__(self, states=None, attributes=None):
         """
         Constructor for the linear system class
         :param states: dictionary containing the following,
             x_1: initial position of ball in metres
             x_2: initial velocity of the ball in metres per second^2
             i: initial value of current in Amps
+        :param attributes: dictionary of the system constants, see DynamicalSystem
         """
-        super().__init__()  # Construct a dynamical system to inherit from
+        super().__init__(attributes)  # Construct a dynamical system to inherit from
 
         # Set the initial conditions of the system
         if states is not None:
@@ -28,21 +33,26 @@ class NonlinearSystem(DynamicalSystem):
             self.__x_2 = self._x_2_e
             self.__i = self._i_e
 
-    def move(self, voltage=0, dt=1, num_points=1001):
+    def move(self, voltage=0, dt=1, num_points=1001, method='Radau', substeps=1):
         """
         Method to make the ball object move according to the dynamics of the system
         :param voltage: Input voltage of the system in volts
         :param dt: The difference between the end and start times in seconds
         :param num_points: The resolution of the graph
+        :param method: The integration method, either an adaptive solve_ivp method or one of fixed_step_methods
+        :param substeps: The number of fixed steps taken between consecutive points, ignored by adaptive methods
         :return: The solution describing the system dynamics over time
         """
         initial_values = (self.__x_1, self.__x_2, self.__i)
-        state_values = solve_ivp(lambda time, z:
-                                 self.ball_dynamics(time, z, voltage),
-                                 [0, dt],
-                                 initial_values,
-                                 method='Radau',
-                                 t_eval=np.linspace(0, dt, num_points))
+        if method in fixed_step_methods:
+            state_values = self.__fixed_step(initial_values, voltage, dt, num_points, method, substeps)
+        else:
+            state_values = solve_ivp(lambda time, z:
+                                     self.ball_dynamics(time, z, voltage),
+                                     [0, dt],
+                                     initial_values,
+                                     method=method,
+                                     t_eval=np.linspace(0, dt, num_points))
 
         final_state = state_values.y.T[-1]
         self.__x_1 = final_state[0]
@@ -50,29 +60,184 @@ class NonlinearSystem(DynamicalSystem):
         self.__i = final_state[2]
         return state_values
 
-    def ball_dynamics(self, time, states, voltage):
+    def __fixed_step(self, initial_values, voltage, dt, num_points, method, substeps):
         """
-        Method to calculate the values of x_1_dot, x_2_dot, and i_dot
-        :param time: Time for the simulation of the system in seconds
+        Method to integrate the system dynamics with a fixed number of steps, giving a known cost per call
+        The whole horizon is stepped in one loop, either for a single trajectory with scalar arithmetic or for a batch
+        of trajectories with every step vectorised over the batch
+        :param initial_values: The initial value of x_1, x_2, and i, either of shape (3,) or (3, n) for n trajectories
+        :param voltage: Input voltage of the system in volts, either a scalar or one value per trajectory
+        :param dt: The difference between the end and start times in seconds
+        :param num_points: The resolution of the graph
+        :param method: Either 'RK4' or 'semi-implicit'
+        :param substeps: The number of fixed steps taken between consecutive points
+        :return: The solution in the same form as solve_ivp, i.e. with attributes t and y, where y has shape
+            (3, num_points) or (3, num_points, n)
+        """
+        if int(substeps) < 1:
+            raise ValueError('The number of substeps must be at least 1')
+        if method not in fixed_step_methods:
+            raise ValueError('The fixed-step method must be one of ' + ', '.join(fixed_step_methods))
+        substeps = int(substeps)
+        step = self.__rk4_step if method == 'RK4' else self.__semi_implicit_step
+
+        initial_values = np.asarray(initial_values, dtype=float)
+        if initial_values.ndim == 1:
+            states = tuple(initial_values.tolist())  # Python floats are much faster than arrays for one trajectory
+        else:
+            states = tuple(initial_values)
+
+        t_eval = np.linspace(0, dt, num_points)
+        h = dt / ((num_points - 1) * substeps) if num_points > 1 else 0.
+        y = np.empty((3, num_points) + initial_values.shape[1:])
+        y[:, 0] = initial_values
+        for k in range(1, (num_points - 1) * substeps + 1):
+            states = step(*states, voltage, h)
+            if k % substeps == 0:
+                y[:, k // substeps] = states
+
+        return OptimizeResult(t=t_eval, y=y, nfev=(4 if method == 'RK4' else 1) * substeps * (num_points - 1),
+                              njev=0, nlu=0, status=0, message='The fixed-step integration was successful.',
+                              success=True)
+
+    def move_batch(self, initial_values, voltage=0, dt=1, num_points=1001, method='RK4', substeps=1):
+        """
+        Method to integrate many trajectories at once with a fixed-step method, without changing the state of the
+        system
+        :param initial_values: Array of shape (3, n) containing the initial value of x_1, x_2, and i of each trajectory
+        :param voltage: Input voltage of the system in volts, either a scalar or one value per trajectory
+        :param dt: The difference between the end and start times in seconds
+        :param num_points: The resolution of the graph
+        :param method: One of fixed_step_methods
+        :param substeps: The number of fixed steps taken between consecutive points
+        :return: The solution with attributes t and y, where y has shape (3, num_points, n)
+        """
+        return self.__fixed_step(np.atleast_2d(initial_values), voltage, dt, num_points, method, substeps)
+
+    def step(self, states, voltage, h, method='RK4'):
+        """
+        Method to advance states by one fixed step, without changing the state of the system
+        The states may be an array of shape (3, n), in which case n trajectories are advanced at once
         :param states: The current value of x_1, x_2, and i
-        :param voltage: Input voltage of the system in volts
-        :return: Value of x_1_dot, x_2_dot and i_dot
+        :param voltage: Input voltage of the system in volts, either a scalar or one value per trajectory
+        :param h: The step size in seconds
+        :param method: Either 'RK4' or 'semi-implicit'
+        :return: The value of x_1, x_2, and i after the step
         """
-        x_1_dot = states[1]
+        if method == 'RK4':
+            return np.array(self.__rk4_step(*states, voltage, h))
+        elif method == 'semi-implicit':
+            return np.array(self.__semi_implicit_step(*states, voltage, h))
+        raise ValueError('The fixed-step method must be one of ' + ', '.join(fixed_step_methods))
 
+    def __derivatives(self, x_1, x_2, i, voltage):
+        """
+        Method to calculate x_1_dot, x_2_dot, and i_dot from each state, which may be scalars or arrays
+        :param x_1: The current value of x_1
+        :param x_2: The current value of x_2
+        :param i: The current value of i
+        :param voltage: Input voltage of the system in volts
+        :return: The tuple (x_1_dot, x_2_dot, i_dot)
+        """
         x_2_dot = (5. / (7. * self._mass)) * \
                   (self._mass * self._gravity * np.sin(self._phi)
-                   + self._c_const * ((states[2]) / (self._delta - states[0])) ** 2
-                   - self._k_spring * (states[0] - self._d_length)
-                   - self._b_damper * states[1])
+                   + self._c_const * (i / (self._delta - x_1)) ** 2
+                   - self._k_spring * (x_1 - self._d_length)
+                   - self._b_damper * x_2)
+
+        i_dot = (voltage - i * self._resistance) / \
+                (self._ell_0 + self._ell_1 * np.exp(-1. * self._alpha * (self._delta - x_1)))
 
-        i_dot = (1. / (self._ell_0 + self._ell_1 * np.exp(-1. * self._alpha * (self._delta - states[0])))) * \
-                (voltage - (states[2] * self._resistance))
+        return x_2, x_2_dot, i_dot
 
-        return [x_1_dot, x_2_dot, i_dot]
+    def __rk4_step(self, x_1, x_2, i, voltage, h):
+        """
+        Method to advance the states by one step of the classical fourth-order Runge-Kutta method
+        :param x_1: The current value of x_1
+        :param x_2: The current value of x_2
+        :param i: The current value of i
+        :param voltage: Input voltage of the system in volts
+        :param h: The step size in seconds
+        :return: The value of x_1, x_2, and i after the step
+        """
+        half = 0.5 * h
+        k_1 = self.__derivatives(x_1, x_2, i, voltage)
+        k_2 = self.__derivatives(x_1 + half * k_1[0], x_2 + half * k_1[1], i + half * k_1[2], voltage)
+        k_3 = self.__derivatives(x_1 + half * k_2[0], x_2 + half * k_2[1], i + half * k_2[2], voltage)
+        k_4 = self.__derivatives(x_1 + h * k_3[0], x_2 + h * k_3[1], i + h * k_3[2], voltage)
+        sixth = h / 6.
+        return (x_1 + sixth * (k_1[0] + 2. * k_2[0] + 2. * k_3[0] + k_4[0]),
+                x_2 + sixth * (k_1[1] + 2. * k_2[1] + 2. * k_3[1] + k_4[1]),
+                i + sixth * (k_1[2] + 2. * k_2[2] + 2. * k_3[2] + k_4[2]))
+
+    def __semi_implicit_step(self, x_1, x_2, i, voltage, h):
+        """
+        Method to advance the states by one semi-implicit Euler step
+        The current and the damping are treated implicitly, so the fast electrical pole R / L cannot make the step
+        unstable, while the remaining forces are treated explicitly
+        :param x_1: The current value of x_1
+        :param x_2: The current value of x_2
+        :param i: The current value of i
+        :param voltage: Input voltage of the system in volts
+        :param h: The step size in seconds
+        :return: The value of x_1, x_2, and i after the step
+        """
+        constant = 5. / (7. * self._mass)
+
+        # Current, implicit in i with the inductance evaluated at the current position
+        inverse_inductance = 1. / (self._ell_0 + self._ell_1 * np.exp(-1. * self._alpha * (self._delta - x_1)))
+        i = (i + h * inverse_inductance * voltage) / (1. + h * inverse_inductance * self._resistance)
+
+        # Speed, implicit in the damping force and using the updated current
+        force = self._mass * self._gravity * np.sin(self._phi) \
+            + self._c_const * (i / (self._delta - x_1)) ** 2 \
+            - self._k_spring * (x_1 - self._d_length)
+        x_2 = (x_2 + h * constant * force) / (1. + h * constant * self._b_damper)
+
+        # Position, using the updated speed
+        x_1 = x_1 + h * x_2
+        return x_1, x_2, i
+
+    def integrator_error(self, voltage=0, dt=1, num_points=1001, method='RK4', substeps=1, rtol=1e-8, atol=1e-10):
+        """
+        Method to measure the accuracy of a fixed-step method against the adaptive Radau solver
+        The state of the system is not changed
+        :param voltage: Input voltage of the system in volts
+        :param dt: The difference between the end and start times in seconds
+        :param num_points: The resolution of the graph
+        :param method: The fixed-step method to be checked
+        :param substeps: The number of fixed steps taken between consecutive points
+        :param rtol: Relative tolerance of the reference solution
+        :param atol: Absolute tolerance of the reference solution
+        :return: The maximum absolute error in x_1, x_2, and i over all points
+        """
+        initial_values = (self.__x_1, self.__x_2, self.__i)
+        reference = solve_ivp(lambda time, z:
+                              self.ball_dynamics(time, z, voltage),
+                              [0, dt],
+                              initial_values,
+                              method='Radau',
+                              t_eval=np.linspace(0, dt, num_points),
+                              rtol=rtol,
+                              atol=atol)
+        if not reference.success:
+            raise RuntimeError('The reference solution failed: ' + reference.message)
+        fixed = self.__fixed_step(initial_values, voltage, dt, num_points, method, substeps)
+        return np.max(np.abs(fixed.y - reference.y), axis=1)
+
+    def ball_dynamics(self, time, states, voltage):
+        """
+        Method to calculate the values of x_1_dot, x_2_dot, and i_dot
+        :param time: Time for the simulation of the system in seconds
+        :param states: The current value of x_1, x_2, and i
+        :param voltage: Input voltage of the system in volts
+        :return: Array of x_1_dot, x_2_dot and i_dot
+        """
+        return np.array(self.__derivatives(states[0], states[1], states[2], voltage))
 
     @staticmethod
-    def plotter(x_axis, y_axis, title=None, file_path=None, multiplot=False, labels=None, label_title=None):
+    def plotter(x_axis, y_axis, title=None, file_path=None, multiplot=False, labels=None, label_title=None,
+                show=True):
         """
         Static method to plot a graph of x_1 (m) against time (s)
         :param x_axis: Values of time to be plotted on the x-axis
@@ -82,6 +247,7 @@ class NonlinearSystem(DynamicalSystem):
         :param multiplot: Boolean to represent if multiple plots are to be made on one graph
         :param labels: The labels to be used in a legend
         :param label_title: The title of the legend
+        :param show: Boolean to represent if the graph is to be displayed
         :return: None
         """
         super(NonlinearSystem, NonlinearSystem).system_plotter(x_axis,
@@ -92,7 +258,8 @@ class NonlinearSystem(DynamicalSystem):
                                                                y_label='${x}_1$ (m)',
                                                                multiplot=multiplot,
                                                                labels=labels,
-                                                               label_title=label_title)
+                                                               label_title=label_title,
+                                                               show=show)
 
 
 if __name__ == '__main__':
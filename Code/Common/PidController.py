@@ -1,4 +1,4 @@
-from control import TransferFunction as Tf
+from Code.Common.StateSpace import StateSpace
 
 
 class PidController:
@@ -61,8 +61,16 @@ class PidController:
         Function to calculate the value of the transfer function of the PID controller
         :return: The value of the transfer function
         """
+        from control import TransferFunction as Tf  # Only needed when round-tripping with python-control
         return Tf([self.__kd, self.__kp, self.__ki], [1, 0])
 
+    def state_space(self):
+        """
+        Method to calculate the state-space model of the PID controller
+        :return: The StateSpace object of the PID controller, using a derivative feedthrough for kd
+        """
+        return StateSpace.from_transfer_function([self.__kd, self.__kp, self.__ki], [1, 0])
+
 
 if __name__ == '__main__':
     print('Please run a different source file.')
@@ -0,0 +1,312 @@
+from Code.Common.LinearSystem import LinearSystem
+from Code.Common.NonlinearSystem import NonlinearSystem
+from Code.Common.PidController import PidController as PidCtrl
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import numpy as np
+import os
+
+state_names = ('x_1', 'x_2', 'i')  # Names of the states of the non-linear system, in order
+
+
+class RegionOfAttraction:
+    """
+    Class to estimate which initial states of the non-linear system converge to the equilibrium point, either in
+    open loop with the equilibrium voltage applied or in closed loop with a PID controller
+    """
+
+    def __init__(self,
+                 pid_gains=None,
+                 t_sampling=0.001,
+                 t_final=2.,
+                 method='RK4',
+                 substeps=2,
+                 tolerances=(1e-4, 1e-3, 1e-3),
+                 contact_gap=0.001,
+                 trust_tolerance=0.1,
+                 attributes=None):
+        """
+        Constructor for the RegionOfAttraction class
+        :param pid_gains: The tuple (kp, kd, ki) of the PID controller, or None for the open-loop system
+        :param t_sampling: Time (seconds) between the consecutive samples of the PID controller
+        :param t_final: Time (seconds) after which a run which has neither converged nor diverged is stopped
+        :param method: The fixed-step method used to integrate the non-linear system, see NonlinearSystem.step
+        :param substeps: The number of fixed steps taken per sample
+        :param tolerances: Distances from the equilibrium of x_1 (m), x_2 (m/s), and i (A) within which a run has
+            converged
+        :param contact_gap: Distance (metres) from the electromagnet at which a run has diverged
+        :param trust_tolerance: Largest error of the linear system, relative to its own largest deviation from
+            equilibrium, for which the linear system is considered trustworthy
+        :param attributes: dictionary of the system constants, see DynamicalSystem
+        """
+        self.__system = NonlinearSystem(attributes=attributes)
+        self.__equilibrium = np.array([self.__system.get_x_1_e(), self.__system.get_x_2_e(), self.__system.get_i_e()])
+        self.__v_e = self.__system.get_v_e()
+        self.__delta = self.__system.get_delta()
+
+        self.__pid_gains = pid_gains
+        self.__t_sampling = t_sampling
+        self.__ticks = int(t_final / t_sampling)
+        self.__method = method
+        self.__substeps = int(substeps)
+        self.__tolerances = np.asarray(tolerances, dtype=float).reshape(3, 1)
+        self.__contact_gap = contact_gap
+        self.__trust_tolerance = trust_tolerance
+
+        # Exact discretisation of the linear system over one fixed step, to be compared with the non-linear system
+        self.__a_d, self.__b_d = LinearSystem(attributes=attributes).state_space().discretise(t_sampling / substeps)
+
+    def get_equilibrium(self):
+        """
+        Getter for the equilibrium values of x_1, x_2, and i
+        :return: Array of the equilibrium states
+        """
+        return self.__equilibrium
+
+    def simulate(self, points):
+        """
+        Method to simulate a batch of initial states at once, stopping once every run has converged or diverged
+        Runs which have finished are dropped from the batch, so that only the runs which are still active are stepped
+        :param points: Array of initial states with one row (x_1, x_2, i) per run
+        :return: dictionary containing the following, with one value per run;
+            converged: Whether the run reached the equilibrium
+            diverged: Whether the ball reached the electromagnet or the wall, or the solution became non-finite
+            undecided: Whether the run had neither converged nor diverged by the final time
+            decision_time: Time (seconds) at which the run converged or diverged, nan if it did neither
+            linear_error: Largest error in x_1 of the linear system, relative to its largest deviation from equilibrium
+            linear_trusted: Whether the linear error is within the trust tolerance
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        n = points.shape[0]
+        states = points.T.copy()
+        linear_states = states - self.__equilibrium[:, np.newaxis]
+
+        converged = np.zeros(n, dtype=bool)
+        diverged = np.zeros(n, dtype=bool)
+        decision_time = np.full(n, np.nan)
+        final_error = np.zeros(n)  # Largest error and deviation of the linear system, once each run has finished
+        final_scale = np.zeros(n)
+        linear_error = np.zeros(n)
+        linear_scale = np.abs(linear_states[0])
+
+        if self.__pid_gains is not None:
+            # The controllers act on the positions of the whole batch, since they keep an error history per run
+            pid = PidCtrl(*self.__pid_gains, ts=self.__t_sampling)
+            linear_pid = PidCtrl(*self.__pid_gains, ts=self.__t_sampling)
+            position = states[0] - self.__equilibrium[0]
+            linear_position = linear_states[0].copy()
+        h = self.__t_sampling / self.__substeps
+
+        # The states and linear errors are only kept for the runs which are still active, in the order of runs
+        runs = np.arange(n)
+        with np.errstate(all='ignore'):  # Runs which diverge may overflow before they are detected
+            for t in range(self.__ticks):
+                if not runs.size:
+                    break
+
+                # Voltages applied to the non-linear system and, relative to the equilibrium, to the linear system
+                voltage = self.__v_e
+                linear_voltage = 0.
+                if self.__pid_gains is not None:
+                    position[runs] = states[0] - self.__equilibrium[0]
+                    linear_position[runs] = linear_states[0]
+                    voltage = voltage + pid.control(position)[runs]
+                    linear_voltage = linear_pid.control(linear_position)[runs]
+
+                for _ in range(self.__substeps):
+                    states = self.__system.step(states, voltage, h, self.__method)
+                    linear_states = self.__a_d @ linear_states + self.__b_d * linear_voltage
+
+                # Compare the position of the ball in the linear and non-linear systems
+                error = np.abs(states[0] - self.__equilibrium[0] - linear_states[0])
+                linear_error = np.fmax(linear_error, np.nan_to_num(error, nan=np.inf))
+                linear_scale = np.fmax(linear_scale, np.abs(linear_states[0]))
+
+                # Classify the runs which are still active, and drop those which have finished
+                finite = np.isfinite(states).all(axis=0)
+                diverged_now = ~finite | (states[0] >= self.__delta - self.__contact_gap) | (states[0] <= 0.)
+                converged_now = ~diverged_now & np.all(
+                    np.abs(states - self.__equilibrium[:, np.newaxis]) <= self.__tolerances, axis=0)
+                decided = diverged_now | converged_now
+                if decided.any():
+                    decision_time[runs[decided]] = (t + 1) * self.__t_sampling
+                    diverged[runs[diverged_now]] = True
+                    converged[runs[converged_now]] = True
+                    final_error[runs[decided]] = linear_error[decided]
+                    final_scale[runs[decided]] = linear_scale[decided]
+
+                    active = ~decided
+                    runs = runs[active]
+                    states = states[:, active]
+                    linear_states = linear_states[:, active]
+                    linear_error = linear_error[active]
+                    linear_scale = linear_scale[active]
+
+        final_error[runs] = linear_error  # Runs which are undecided at the final time
+        final_scale[runs] = linear_scale
+        linear_error = final_error / np.fmax(final_scale, self.__tolerances[0, 0])
+        return {
+            'converged': converged,
+            'diverged': diverged,
+            'undecided': ~(converged | diverged),
+            'decision_time': decision_time,
+            'linear_error': linear_error,
+            'linear_trusted': linear_error <= self.__trust_tolerance
+        }
+
+    def _evaluate(self, points, executor, batch_size):
+        """
+        Method to simulate initial states in batches, in parallel if a process pool is given
+        :param points: Array of initial states with one row (x_1, x_2, i) per run
+        :param executor: A ProcessPoolExecutor object, or None to simulate in this process
+        :param batch_size: The number of runs simulated together
+        :return: dictionary of results, see simulate
+        """
+        batches = [points[j:j + batch_size] for j in range(0, points.shape[0], batch_size)]
+        results = executor.map(self.simulate, batches) if executor is not None else map(self.simulate, batches)
+        results = list(results)
+        return {key: np.concatenate([batch[key] for batch in results]) for key in results[0]}
+
+    def estimate(self, ranges, num_points=5, levels=4, trust_iterations=10, batch_size=500, workers=None):
+        """
+        Method to map the region of attraction with adaptive grid refinement
+        A coarse grid of initial states is simulated first, then every cell with both a converged and a diverged
+        corner is split in half along each axis, so that only the boundary of the region is resolved finely
+        The limit of the linear system is found separately, by bisecting along rays from the equilibrium to each
+        point on the surface of the coarse grid, since it usually lies well within the finest cells of the grid
+        :param ranges: dictionary mapping x_1, x_2, and i to either a tuple (low, high) to be mapped, or a single value
+            at which the state is held, with states which are missing held at equilibrium
+        :param num_points: The number of points along each mapped axis of the coarse grid
+        :param levels: The number of times the boundary cells are refined
+        :param trust_iterations: The number of times the interval along each ray is halved when finding the limit of the
+            linear system, with several points per ray simulated in each round when there are more workers than rays
+        :param batch_size: The number of runs simulated together
+        :param workers: The number of processes to use, all cores if None and no process pool if 1
+        :return: dictionary of results, see simulate, together with the following;
+            points: Array of every initial state simulated, one row (x_1, x_2, i) per run
+            boundary: Array of the centres of the finest cells with both a converged and a diverged corner
+            trust_boundary: Array of the untrusted end of the final interval along each ray on which the linear system
+                stops being trustworthy
+            linear_limit: The point of trust_boundary closest to equilibrium, relative to the mapped ranges, None if
+                the linear system is trustworthy along every ray
+        """
+        ranges = {} if ranges is None else ranges
+        fixed = self.__equilibrium.copy()
+        axes = []
+        for k, name in enumerate(state_names):
+            value = ranges.get(name, fixed[k])
+            if np.ndim(value) == 0:
+                fixed[k] = value
+            else:
+                axes.append((k, float(value[0]), float(value[1])))
+        if not axes:
+            raise ValueError('At least one state must be given a range to be mapped')
+
+        # Vertices are indexed on the lattice of the finest level, so that each one is only simulated once
+        scale = 2 ** levels
+        extent = (num_points - 1) * scale
+
+        def to_states(indices):
+            states = np.tile(fixed, (len(indices), 1))
+            for column, (k, low, high) in enumerate(axes):
+                states[:, k] = low + np.array([index[column] for index in indices]) * (high - low) / extent
+            return states
+
+        def corners(cell):
+            origin, size = cell
+            return [tuple(o + size * c for o, c in zip(origin, offset))
+                    for offset in itertools.product((0, 1), repeat=len(axes))]
+
+        cache = {}  # Maps the index of each vertex to its row in the results
+        points = []
+        results = []
+
+        def simulate(states, executor, size=batch_size):
+            points.append(states)
+            results.append(self._evaluate(states, executor, size))
+            return results[-1]
+
+        def evaluate(cells, executor):
+            new = sorted({vertex for cell in cells for vertex in corners(cell) if vertex not in cache})
+            if new:
+                rows = sum(len(batch) for batch in points)
+                for j, vertex in enumerate(new):
+                    cache[vertex] = rows + j
+                simulate(to_states(new), executor)
+
+        def outcome(key, vertices):
+            values = np.concatenate([batch[key] for batch in results])
+            return np.array([values[cache[vertex]] for vertex in vertices], dtype=bool)
+
+        def mixed(cells):
+            # Undecided runs are ignored, so a cell is only refined if it has both a converged and a diverged corner
+            return [cell for cell in cells
+                    if outcome('converged', corners(cell)).any() and outcome('diverged', corners(cell)).any()]
+
+        cells = [(tuple(scale * c for c in origin), scale)
+                 for origin in itertools.product(range(num_points - 1), repeat=len(axes))]
+        executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+        num_workers = 1 if executor is None else workers or os.cpu_count() or 1
+        try:
+            evaluate(cells, executor)
+            for _ in range(levels):
+                cells = [(tuple(o + (cell[1] // 2) * c for o, c in zip(cell[0], offset)), cell[1] // 2)
+                         for cell in mixed(cells)
+                         for offset in itertools.product((0, 1), repeat=len(axes))]
+                evaluate(cells, executor)
+            boundary = mixed(cells)
+
+            # Rays start at the equilibrium, held within the mapped ranges, and end on the surface of the coarse grid
+            origin = fixed.copy()
+            for k, low, high in axes:
+                origin[k] = np.clip(self.__equilibrium[k], min(low, high), max(low, high))
+            surface = [vertex for vertex in itertools.product(range(0, extent + 1, scale), repeat=len(axes))
+                       if any(index in (0, extent) for index in vertex)]
+            ends = to_states(surface)
+
+            # Bisect the fraction of each ray between its last trusted and first untrusted point
+            low_fraction = np.zeros(len(surface))
+            high_fraction = np.ones(len(surface))
+            limited = ~outcome('linear_trusted', surface)  # Rays along which the linear system stops being trusted
+            if not simulate(origin[np.newaxis], executor)['linear_trusted'][0]:
+                limited[:] = True
+                high_fraction[:] = 0.
+            elif limited.any():
+                # Each round simulates enough points to give every worker a batch, dividing the interval on each ray
+                # into sections + 1 parts, so fewer rounds are needed than with bisection alone
+                rays = np.flatnonzero(limited)
+                sections = -(-num_workers // rays.size)
+                rounds = int(np.ceil(trust_iterations / np.log2(sections + 1)))
+                ray_batch_size = min(batch_size, -(-rays.size * sections // num_workers))
+                for _ in range(rounds):
+                    bounds = np.linspace(low_fraction[rays], high_fraction[rays], sections + 2, axis=1)
+                    middle = bounds[:, 1:-1]
+                    states = origin + middle.reshape(-1, 1) * np.repeat(ends[rays] - origin, sections, axis=0)
+                    trusted = simulate(states, executor, ray_batch_size)['linear_trusted'].reshape(rays.size, sections)
+
+                    # The new interval ends at the first untrusted point along each ray
+                    first = np.where(trusted.all(axis=1), sections, np.argmin(trusted, axis=1))
+                    low_fraction[rays] = bounds[np.arange(rays.size), first]
+                    high_fraction[rays] = bounds[np.arange(rays.size), first + 1]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        output = {key: np.concatenate([batch[key] for batch in results]) for key in results[0]}
+        output['points'] = np.concatenate(points)
+        output['boundary'] = to_states([tuple(o + cell[1] / 2 for o in cell[0]) for cell in boundary]) \
+            if boundary else np.empty((0, 3))
+        output['trust_boundary'] = origin + high_fraction[limited, np.newaxis] * (ends[limited] - origin)
+
+        # Untrusted point closest to equilibrium, with each mapped state scaled by the size of its range
+        output['linear_limit'] = None
+        if limited.any():
+            spans = np.array([abs(high - low) for _, low, high in axes])
+            columns = [k for k, _, _ in axes]
+            distance = np.linalg.norm((output['trust_boundary'][:, columns] - origin[columns]) / spans, axis=1)
+            output['linear_limit'] = output['trust_boundary'][np.argmin(distance)]
+        return output
+
+
+if __name__ == '__main__':
+    print('Please run a different source file.')
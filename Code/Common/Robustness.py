@@ -0,0 +1,251 @@
+from Code.Common.DynamicalSystem import constants
+from Code.Common.LinearSystem import LinearSystem
+from Code.Common.PidController import PidController as PidCtrl
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+import numpy as np
+import os
+
+# Default relative standard deviations of the constants which vary from unit to unit
+default_tolerances = {
+    'mass': 0.05,
+    'k_spring': 0.05,
+    'resistance': 0.05
+}
+
+
+class Robustness:
+    """
+    Class to define a Monte Carlo robustness analysis of the PID controlled linear system
+    """
+
+    def __init__(self,
+                 kp=70,
+                 kd=5.5,
+                 ki=450,
+                 t_sampling=0.001,
+                 t_final=1,
+                 ball_position=0.1,
+                 applied_voltage=2.,
+                 set_point=0.,
+                 band=0.001,
+                 tolerances=None,
+                 attributes=None):
+        """
+        Constructor for the Robustness class
+        :param kp: The continuous-time gain for the proportional controller
+        :param kd: The continuous-time gain for the differential controller
+        :param ki: The continuous-time gain for the integral controller
+        :param t_sampling: Time (seconds) between the consecutive samples of the PID controller
+        :param t_final: Time (seconds) for the simulation of each unit
+        :param ball_position: Initial position (metres) of the ball relative to the equilibrium point
+        :param applied_voltage: Input voltage (volts) applied to the linear system, relative to the equilibrium voltage
+        :param set_point: Set point (metres) for the ball to tend to, relative to the equilibrium point
+        :param band: Half-width (metres) of the band around the set point in which a unit is considered settled
+        :param tolerances: dictionary of the relative standard deviation of each perturbed constant
+        :param attributes: dictionary of the nominal system constants, see DynamicalSystem
+        """
+        self.__kp = kp
+        self.__kd = kd
+        self.__ki = ki
+        self.__t_sampling = t_sampling
+        self.__ticks = int(t_final / t_sampling)  # Total number of samples taken
+        self.__ball_position = ball_position
+        self.__applied_voltage = applied_voltage
+        self.__set_point = set_point
+        self.__band = band
+        self.__tolerances = dict(default_tolerances if tolerances is None else tolerances)
+        self.__attributes = dict(constants if attributes is None else attributes)
+
+    def sample(self, n, rng):
+        """
+        Method to sample perturbed sets of the system constants
+        :param n: The number of units to be sampled
+        :param rng: A numpy.random.Generator object
+        :return: A list of n dictionaries of system constants
+        """
+        scales = {key: 1. + tolerance * rng.standard_normal(n) for key, tolerance in self.__tolerances.items()}
+        units = []
+        for j in range(n):
+            attributes = dict(self.__attributes)
+            for key, scale in scales.items():
+                attributes[key] = self.__attributes[key] * scale[j]
+            units.append(attributes)
+        return units
+
+    def simulate(self, units):
+        """
+        Method to simulate the PID controlled system for a batch of units at once
+        The linear system is discretised exactly, since the control variable is held between samples
+        :param units: A list of dictionaries of system constants
+        :return: The trajectories of x_1_bar, as an array with one row per unit and one column per sample
+        """
+        a_d = np.empty((len(units), 3, 3))
+        b_d = np.empty((len(units), 3))
+        for j, attributes in enumerate(units):
+            a_d[j], b = LinearSystem(attributes=attributes).state_space().discretise(self.__t_sampling)
+            b_d[j] = b[:, 0]
+
+        states = np.zeros((len(units), 3))
+        states[:, 0] = self.__ball_position
+        x_cache = np.empty((len(units), self.__ticks + 1))
+        x_cache[:, 0] = states[:, 0]
+
+        # A single controller acts on the whole batch, since the control law is applied element-wise
+        pid = PidCtrl(kp=self.__kp, kd=self.__kd, ki=self.__ki, ts=self.__t_sampling)
+        for t in range(self.__ticks):
+            voltage = pid.control(states[:, 0], self.__set_point) + self.__applied_voltage
+            states = np.einsum('jkl,jl->jk', a_d, states) + b_d * voltage[:, np.newaxis]
+            x_cache[:, t + 1] = states[:, 0]
+        return x_cache
+
+    def metrics(self, x_cache):
+        """
+        Method to calculate the settling and overshoot of each trajectory
+        :param x_cache: The trajectories of x_1_bar, one row per unit
+        :return: dictionary containing the following, with one value per unit;
+            settled: Whether the unit finishes within the band around the set point
+            settling_time: Time (seconds) after which the unit stays within the band, nan if it never settles
+            overshoot: Percentage of the initial error by which the unit passes the set point, zero for a unit which
+                starts at the set point
+        """
+        error = x_cache - self.__set_point
+        outside = ~(np.abs(error) <= self.__band)  # Units without an equilibrium give nan, i.e. never settle
+        settled = ~outside[:, -1]
+
+        # Index of the first sample after the last sample outside the band
+        last_outside = outside.shape[1] - np.argmax(outside[:, ::-1], axis=1)
+        last_outside[~outside.any(axis=1)] = 0
+        settling_time = np.where(settled, last_outside * self.__t_sampling, np.nan)
+
+        initial_error = error[:, :1]
+        overshoot = np.max(-np.sign(initial_error) * error, axis=1).clip(min=0.)
+        overshoot = np.divide(100. * overshoot, np.abs(initial_error[:, 0]),
+                              out=np.zeros_like(overshoot),
+                              where=initial_error[:, 0] != 0.)  # No set point to pass when starting on it
+
+        return {
+            'settled': settled,
+            'settling_time': settling_time,
+            'overshoot': overshoot
+        }
+
+    def _batch(self, n, seed):
+        """
+        Method to sample, simulate, and evaluate one batch of units
+        :param n: The number of units in the batch
+        :param seed: A numpy.random.SeedSequence object for the batch
+        :return: dictionary of the metrics of the batch, together with the perturbed constants
+        """
+        units = self.sample(n, np.random.default_rng(seed))
+        results = self.metrics(self.simulate(units))
+        for key in self.__tolerances:
+            results[key] = np.array([attributes[key] for attributes in units])
+        return results
+
+    def stream(self, n, batch_size=1000, workers=None, seed=None):
+        """
+        Generator to run the analysis in batches, yielding the results of each batch as soon as it is available
+        Batches may finish out of order, and at most two batches per worker are submitted at once, so the results
+        waiting to be consumed stay bounded however many units are simulated
+        :param n: The total number of units to be simulated
+        :param batch_size: The number of units simulated together
+        :param workers: The number of processes to use, all cores if None and no process pool if 1
+        :param seed: Seed for the random number generator, so that the analysis can be repeated
+        :return: Generator of dictionaries of metrics, see metrics
+        """
+        sizes = [batch_size] * (n // batch_size) + ([n % batch_size] if n % batch_size else [])
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+        if workers == 1:
+            for size, batch_seed in zip(sizes, seeds):
+                yield self._batch(size, batch_seed)
+        else:
+            limit = 2 * (workers or os.cpu_count() or 1)  # Maximum number of batches submitted at once
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = set()
+                for size, batch_seed in zip(sizes, seeds):
+                    pending.add(executor.submit(self._batch, size, batch_seed))
+                    if len(pending) >= limit:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+                for future in as_completed(pending):
+                    yield future.result()
+
+    def summarise(self, results, percentiles=(5, 50, 95), bins=10000, max_overshoot=100.):
+        """
+        Method to consume a stream of results and report the yield
+        Each batch is reduced to counts in fixed bins as it arrives, so the memory used does not grow with the number of
+        units, and the percentiles are interpolated within the bins
+        :param results: An iterable of dictionaries of metrics, e.g. from stream
+        :param percentiles: The percentiles of overshoot and settling time to be reported
+        :param bins: The number of bins for each of overshoot and settling time
+        :param max_overshoot: The upper end (%) of the bins for the overshoot, larger overshoots are counted but a
+            percentile which falls among them is reported as infinite
+        :return: dictionary containing the following;
+            units: The number of units simulated
+            yield: The fraction of units which settle within the band, nan if no units were simulated
+            overshoot: dictionary mapping each percentile to the overshoot (%)
+            settling_time: dictionary mapping each percentile to the settling time (s) of the settled units
+        """
+        overshoot_edges = np.linspace(0., max_overshoot, bins + 1)
+        settling_edges = np.linspace(0., self.__ticks * self.__t_sampling, bins + 1)
+        overshoot_counts = np.zeros(bins + 2, dtype=np.int64)  # Including a bin below and a bin above the edges
+        settling_counts = np.zeros(bins + 2, dtype=np.int64)
+        units = 0
+        settled = 0
+        for batch in results:
+            units += batch['settled'].size
+            settled += np.count_nonzero(batch['settled'])
+            overshoot_counts += self.__histogram(batch['overshoot'], overshoot_edges)
+            settling_counts += self.__histogram(batch['settling_time'], settling_edges)
+
+        return {
+            'units': units,
+            'yield': settled / units if units else np.nan,
+            'overshoot': dict(zip(percentiles, self.__percentiles(overshoot_counts, overshoot_edges, percentiles))),
+            'settling_time': dict(zip(percentiles, self.__percentiles(settling_counts, settling_edges, percentiles)))
+        }
+
+    @staticmethod
+    def __histogram(values, edges):
+        """
+        Static method to count values in fixed bins, ignoring nan values
+        :param values: Array of values
+        :param edges: The edges of the bins, in increasing order
+        :return: Array of the number of values below the edges, in each bin, and above the edges
+        """
+        values = values[~np.isnan(values)]
+        index = np.searchsorted(edges, values, side='right')
+        index[values == edges[-1]] = edges.size - 1  # The upper edge belongs to the last bin
+        return np.bincount(index, minlength=edges.size + 1)
+
+    @staticmethod
+    def __percentiles(counts, edges, percentiles):
+        """
+        Static method to estimate percentiles from counts in fixed bins, by linear interpolation within a bin
+        :param counts: Array of counts, as returned by __histogram
+        :param edges: The edges of the bins
+        :param percentiles: The percentiles to be estimated
+        :return: List of the percentiles, nan if there are no counts and infinite if outside the edges
+        """
+        total = counts.sum()
+        if not total:
+            return [np.nan] * len(percentiles)
+        cumulative = np.cumsum(counts)
+        estimates = []
+        for percentile in percentiles:
+            rank = max(percentile / 100. * total, np.finfo(float).tiny)  # Rank 0 lies in the first non-empty bin
+            j = int(np.searchsorted(cumulative, rank, side='left'))
+            if j == 0:
+                estimates.append(-np.inf)
+            elif j == edges.size:
+                estimates.append(np.inf)
+            else:
+                fraction = (rank - cumulative[j - 1]) / counts[j]
+                estimates.append(edges[j - 1] + fraction * (edges[j] - edges[j - 1]))
+        return estimates
+
+
+if __name__ == '__main__':
+    print('Please run a different source file.')
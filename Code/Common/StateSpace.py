@@ -0,0 +1,319 @@
+from scipy.linalg import expm
+import numpy as np
+
+# Largest number of points for which time responses are evaluated from all the powers of A_d at once
+short_grid_points = 4096
+
+
+class StateSpace:
+    """
+    Class to define a lightweight continuous-time SISO state-space model
+        x_dot = A x + B u
+        y = C x + D u + E u_dot
+    The derivative feedthrough E allows the (improper) PID controller to be represented, and is eliminated exactly
+    when it is placed in series with a strictly proper system such as the linear ball
+    """
+
+    def __init__(self, a, b, c, d=0., e=0.):
+        """
+        Constructor for the StateSpace class
+        :param a: The state matrix (n x n)
+        :param b: The input matrix (n x 1)
+        :param c: The output matrix (1 x n)
+        :param d: The direct feedthrough of the input
+        :param e: The direct feedthrough of the derivative of the input
+        """
+        self.__a = np.atleast_2d(np.asarray(a, dtype=float))
+        n = self.__a.shape[0] if self.__a.size else 0
+        self.__a = self.__a.reshape(n, n)
+        self.__b = np.asarray(b, dtype=float).reshape(n, 1)
+        self.__c = np.asarray(c, dtype=float).reshape(1, n)
+        self.__d = float(d)
+        self.__e = float(e)
+
+        self.__discrete_cache = {}  # Exact discretisations of (A, B), keyed by the sampling time
+
+    @classmethod
+    def from_transfer_function(cls, num, den):
+        """
+        Class method to realise a transfer function in controllable canonical form
+        :param num: Coefficients of the numerator polynomial, highest power of s first
+        :param den: Coefficients of the denominator polynomial, highest power of s first
+        :return: The StateSpace realisation of num / den
+        """
+        num = np.trim_zeros(np.atleast_1d(np.asarray(num, dtype=float)), 'f')
+        den = np.trim_zeros(np.atleast_1d(np.asarray(den, dtype=float)), 'f')
+        if den.size == 0:
+            raise ValueError('The denominator of the transfer function must be non-zero')
+        if num.size == 0:
+            num = np.array([0.])
+        if num.size > den.size + 1:
+            raise ValueError('Transfer functions with more than one excess zero cannot be realised')
+
+        # Normalise the denominator and split off the polynomial part of num / den
+        num = num / den[0]
+        den = den / den[0]
+        quotient, remainder = np.polydiv(num, den)
+        quotient = np.concatenate((np.zeros(2 - quotient.size), quotient))
+        e, d = quotient
+
+        order = den.size - 1
+        remainder = np.trim_zeros(remainder, 'f')
+        remainder = np.concatenate((np.zeros(order - remainder.size), remainder))
+
+        a = np.zeros((order, order))
+        if order:
+            a[:-1, 1:] = np.eye(order - 1)
+            a[-1, :] = -den[:0:-1]
+        b = np.zeros((order, 1))
+        if order:
+            b[-1, 0] = 1.
+        c = remainder[::-1].reshape(1, order)
+        return cls(a, b, c, d, e)
+
+    @classmethod
+    def from_control(cls, system):
+        """
+        Class method to convert a python-control SISO system into a StateSpace object
+        :param system: A control.TransferFunction or control.StateSpace object
+        :return: The equivalent StateSpace object
+        """
+        import control  # Only needed when round-tripping with python-control
+        system = control.ss(system)
+        return cls(system.A, system.B, system.C, np.asarray(system.D).item())
+
+    def to_control(self):
+        """
+        Method to convert the StateSpace object into a python-control state-space system
+        :return: The equivalent control.StateSpace object
+        """
+        if self.__e != 0.:
+            raise ValueError('A system with a derivative feedthrough cannot be converted to python-control')
+        import control  # Only needed when round-tripping with python-control
+        return control.ss(self.__a, self.__b, self.__c, self.__d)
+
+    def get_matrices(self):
+        """
+        Getter for the matrices of the state-space model
+        :return: The tuple (A, B, C, D, E)
+        """
+        return self.__a, self.__b, self.__c, self.__d, self.__e
+
+    def get_order(self):
+        """
+        Getter for the number of states of the model
+        :return: The number of states
+        """
+        return self.__a.shape[0]
+
+    def series(self, other):
+        """
+        Method to connect this system in series with another, with the output of this system feeding the other
+        :param other: The downstream StateSpace object
+        :return: The StateSpace object of the series connection
+        """
+        a_1, b_1, c_1, d_1, e_1 = self.get_matrices()
+        a_2, b_2, c_2, d_2, e_2 = other.get_matrices()
+        if e_1 != 0. and e_2 != 0.:
+            raise ValueError('The series connection would require the second derivative of the input')
+
+        # The downstream state is shifted by B_2 E_1 u so that the derivative of the input is eliminated
+        n_1 = self.get_order()
+        n_2 = other.get_order()
+        a = np.block([[a_1, np.zeros((n_1, n_2))],
+                      [b_2 @ c_1, a_2]])
+        b = np.vstack((b_1, a_2 @ b_2 * e_1 + b_2 * d_1))
+        c = np.hstack((d_2 * c_1 + e_2 * c_1 @ a_1, c_2))
+        d = (c_2 @ b_2).item() * e_1 + d_2 * d_1 + e_2 * (c_1 @ b_1).item()
+        e = d_2 * e_1 + e_2 * d_1
+        return StateSpace(a, b, c, d, e)
+
+    def parallel(self, other):
+        """
+        Method to connect this system in parallel with another, summing their outputs
+        :param other: The other StateSpace object
+        :return: The StateSpace object of the parallel connection
+        """
+        a_1, b_1, c_1, d_1, e_1 = self.get_matrices()
+        a_2, b_2, c_2, d_2, e_2 = other.get_matrices()
+        n_1 = self.get_order()
+        n_2 = other.get_order()
+        a = np.block([[a_1, np.zeros((n_1, n_2))],
+                      [np.zeros((n_2, n_1)), a_2]])
+        return StateSpace(a, np.vstack((b_1, b_2)), np.hstack((c_1, c_2)), d_1 + d_2, e_1 + e_2)
+
+    def feedback(self, other=None, sign=-1):
+        """
+        Method to close a feedback loop around this system, with the other system in the feedback path
+        :param other: The StateSpace object in the feedback path, unity feedback if None
+        :param sign: The sign of the feedback, -1 for negative feedback
+        :return: The StateSpace object of the closed-loop system
+        """
+        if other is None:
+            other = StateSpace(np.zeros((0, 0)), np.zeros((0, 1)), np.zeros((1, 0)), 1.)
+        a_1, b_1, c_1, d_1, e_1 = self.get_matrices()
+        a_2, b_2, c_2, d_2, e_2 = other.get_matrices()
+        if e_1 != 0. or e_2 != 0.:
+            raise ValueError('Feedback loops cannot contain a derivative feedthrough')
+
+        denominator = 1. - sign * d_1 * d_2
+        if denominator == 0.:
+            raise ValueError('The feedback loop is algebraically ill-posed')
+
+        # Output of the forward path, y = c_y x + d_y u, with x the stacked states of both systems
+        c_y = np.hstack((c_1, sign * d_1 * c_2)) / denominator
+        d_y = d_1 / denominator
+
+        # Signal entering the forward path, e = u + sign * (C_2 x_2 + D_2 y)
+        c_e = np.hstack((np.zeros_like(c_1), sign * c_2)) + sign * d_2 * c_y
+        d_e = 1. + sign * d_2 * d_y
+
+        n_1 = self.get_order()
+        n_2 = other.get_order()
+        a = np.block([[a_1, np.zeros((n_1, n_2))],
+                      [np.zeros((n_2, n_1)), a_2]])
+        a += np.vstack((b_1 @ c_e, b_2 @ c_y))
+        b = np.vstack((b_1 * d_e, b_2 * d_y))
+        return StateSpace(a, b, c_y, d_y)
+
+    def __mul__(self, other):
+        """
+        Series connection following the python-control convention, i.e. (G_1 * G_2)(s) = G_1(s) G_2(s)
+        :param other: The upstream StateSpace object
+        :return: The StateSpace object of the series connection
+        """
+        return other.series(self)
+
+    def __add__(self, other):
+        """
+        Parallel connection of two systems
+        :param other: The other StateSpace object
+        :return: The StateSpace object of the parallel connection
+        """
+        return self.parallel(other)
+
+    def discretise(self, ts):
+        """
+        Method to calculate the exact zero-order-hold discretisation of the state equation
+        :param ts: The sampling time in seconds
+        :return: The discrete-time matrices (A_d, B_d)
+        """
+        if ts not in self.__discrete_cache:
+            n = self.get_order()
+            augmented = np.zeros((n + 1, n + 1))
+            augmented[:n, :n] = self.__a
+            augmented[:n, n:] = self.__b
+            exponential = expm(augmented * ts)
+            self.__discrete_cache[ts] = (exponential[:n, :n], exponential[:n, n:])
+        return self.__discrete_cache[ts]
+
+    @staticmethod
+    def __sampling_time(t):
+        """
+        Static method to check that a time vector is uniformly spaced and starts at zero
+        :param t: The time vector in seconds
+        :return: The sampling time in seconds
+        """
+        t = np.asarray(t, dtype=float)
+        if t.ndim != 1 or t.size < 2 or t[0] != 0.:
+            raise ValueError('The time vector must be one-dimensional, start at zero and have at least two points')
+        steps = np.diff(t)
+        ts = steps[0]
+        if not np.allclose(steps, ts, rtol=1e-9, atol=0.):
+            raise ValueError('The time vector must be uniformly spaced')
+        return ts
+
+    @staticmethod
+    def __powers(a_d, num_points):
+        """
+        Static method to calculate A_d^k for k = 0, ..., num_points - 1 by repeated doubling
+        :param a_d: The discrete-time state matrix
+        :param num_points: The number of powers to calculate
+        :return: Array of shape (num_points, n, n) containing the powers
+        """
+        powers = np.eye(a_d.shape[0])[np.newaxis]
+        step = a_d
+        while powers.shape[0] < num_points:
+            powers = np.concatenate((powers, powers @ step))
+            step = step @ step
+        return powers[:num_points]
+
+    def __state_output(self, a_d, b_d, x_0, u, num_points):
+        """
+        Method to calculate C x_k for k = 0, ..., num_points - 1, where x_(k + 1) = A_d x_k + B_d u_k
+        Short grids are evaluated at once from the powers of A_d, while longer grids use the state recursion, so the
+        cost stays linear in the number of points and the powers of A_d are never all held in memory
+        :param a_d: The discrete-time state matrix
+        :param b_d: The discrete-time input matrix
+        :param x_0: Initial state of the system, zero if None
+        :param u: Values of the input at each time, zero if None
+        :param num_points: The number of points to be calculated
+        :return: The output C x_k at each point
+        """
+        if num_points <= short_grid_points:
+            powers = self.__powers(a_d, num_points)
+            y = np.zeros(num_points)
+            if x_0 is not None:
+                y += (self.__c @ powers @ x_0.reshape(-1, 1))[:, 0, 0]
+            if u is not None:
+                markov = (self.__c @ powers[:-1] @ b_d)[:, 0, 0]
+                y[1:] += np.convolve(markov, u[:-1])[:num_points - 1]
+            return y
+
+        c = self.__c[0]
+        b = b_d[:, 0]
+        x = np.zeros(a_d.shape[0]) if x_0 is None else x_0.reshape(-1).copy()
+        y = np.empty(num_points)
+        for k in range(num_points):
+            y[k] = c @ x
+            x = a_d @ x
+            if u is not None:
+                x += b * u[k]
+        return y
+
+    def impulse_response(self, t):
+        """
+        Method to calculate the impulse response of the system, ignoring the impulsive part due to D
+        :param t: Uniformly spaced values of time starting at zero, in seconds
+        :return: The time vector and the output of the system
+        """
+        t = np.asarray(t, dtype=float)
+        a_d, b_d = self.discretise(self.__sampling_time(t))
+        y = self.__state_output(a_d, b_d, self.__b, None, t.size)
+        return t, y
+
+    def step_response(self, t):
+        """
+        Method to calculate the unit step response of the system, ignoring the impulsive part due to E
+        :param t: Uniformly spaced values of time starting at zero, in seconds
+        :return: The time vector and the output of the system
+        """
+        t = np.asarray(t, dtype=float)
+        a_d, b_d = self.discretise(self.__sampling_time(t))
+        y = self.__state_output(a_d, b_d, None, np.ones(t.size), t.size) + self.__d
+        return t, y
+
+    def forced_response(self, t, u, x_0=None):
+        """
+        Method to calculate the response of the system to an input held constant between samples
+        :param t: Uniformly spaced values of time starting at zero, in seconds
+        :param u: Values of the input at each time
+        :param x_0: Initial state of the system, zero if None
+        :return: The time vector and the output of the system
+        """
+        if self.__e != 0.:
+            raise ValueError('The forced response of a system with a derivative feedthrough is undefined for a '
+                             'piecewise constant input')
+        t = np.asarray(t, dtype=float)
+        u = np.broadcast_to(np.asarray(u, dtype=float), t.shape)
+        a_d, b_d = self.discretise(self.__sampling_time(t))
+        if x_0 is not None:
+            x_0 = np.asarray(x_0, dtype=float)
+
+        # y_k = C A_d^k x_0 + sum_j C A_d^(k - 1 - j) B_d u_j + D u_k
+        y = self.__state_output(a_d, b_d, x_0, u, t.size) + self.__d * u
+        return t, y
+
+
+if __name__ == '__main__':
+    print('Please run a different source file.')
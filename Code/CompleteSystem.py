@@ -1,14 +1,19 @@
+from Code.Common.DynamicalSystem import default_figures_dir
 from Code.Common.LinearSystem import LinearSystem
 from Code.Common.PidController import PidController as PidCtrl
 from Code.Common.Routh import Routh
-from control import TransferFunction as Tf
-from control import impulse_response as ir
-from control import step_response as sr
-from control import feedback as fb
+from Code.Common.StateSpace import StateSpace as Ss
 import numpy as np
+import os
 
 
-if __name__ == '__main__':
+def complete_system(figures_dir=default_figures_dir, show=True):
+    """
+    Function to plot the impulse and step responses of the whole PID controlled system
+    :param figures_dir: The directory where the figure will be saved
+    :param show: Boolean to represent if the graph is to be displayed
+    :return: None
+    """
     # Declare time variables
     dt = 1  # Time for the simulation of the system in seconds
     num_points = 1001  # Resolution of the graph
@@ -32,17 +37,17 @@ if __name__ == '__main__':
     ball = LinearSystem()  # Create a linear system
     pid = PidCtrl(kp=kp, kd=kd, ki=ki, ts=pid_t_sampling)  # PID controller
 
-    # Declare all transfer functions
-    g_x = ball.transfer_function()  # Transfer function of the linear system
-    g_pid = pid.transfer_function()  # Transfer function of the PID controller
-    g_laser = Tf([1], [laser_t_sampling, 1])  # Transfer function of the laser measurement system
-    g_system = fb(g_x * g_pid, g_laser)  # Transfer function of the whole system
+    # Declare all state-space models, equivalent to the transfer functions of each block
+    g_x = ball.state_space()  # Model of the linear system
+    g_pid = pid.state_space()  # Model of the PID controller
+    g_laser = Ss.from_transfer_function([1], [laser_t_sampling, 1])  # Model of the laser measurement system
+    g_system = (g_x * g_pid).feedback(g_laser)  # Model of the whole system
 
     # Impulse response of the system
-    t_imp, system_imp = ir(g_system, T=t_span)
+    t_imp, system_imp = g_system.impulse_response(t_span)
 
     # Step response of the system
-    t_step, system_step = sr(g_system, T=t_span)
+    t_step, system_step = g_system.step_response(t_span)
 
     # Define variables for the graph
     x_axis = [t_imp, t_step]
@@ -53,7 +58,12 @@ if __name__ == '__main__':
     # Plot a graph of x_1_bar (m) against time (s)
     ball.plotter(x_axis,
                  y_axis,
-                 file_path='.\\Figures\\system_responses.svg',
+                 file_path=os.path.join(figures_dir, 'system_responses.svg'),
                  multiplot=True,
                  labels=labels,
-                 h_lines=h_lines)
+                 h_lines=h_lines,
+                 show=show)
+
+
+if __name__ == '__main__':
+    complete_system()
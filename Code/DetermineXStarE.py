@@ -1,8 +1,15 @@
-from Code.Common.DynamicalSystem import DynamicalSystem, constants
+from Code.Common.DynamicalSystem import DynamicalSystem, constants, default_figures_dir
 import numpy as np
+import os
 
 
-if __name__ == '__main__':
+def determine_x_star_e(figures_dir=default_figures_dir, show=True):
+    """
+    Function to determine x_e_star, the equilibrium position which requires the largest voltage
+    :param figures_dir: The directory where the figure will be saved
+    :param show: Boolean to represent if the graph is to be displayed
+    :return: None
+    """
     # Define the x_1_e variables
     x_1_e_min = constants['d_length'] + \
                 (constants['mass'] * constants['gravity'] * np.sin(constants['phi']) / constants['k_spring'])
@@ -32,4 +39,9 @@ if __name__ == '__main__':
                                      v_e_array,
                                      x_label='$x_1^e$ (m)',
                                      y_label='$V^e$ (V)',
-                                     file_path='.\\Figures\\ve_against_x1e.svg')
+                                     file_path=os.path.join(figures_dir, 've_against_x1e.svg'),
+                                     show=show)
+
+
+if __name__ == '__main__':
+    determine_x_star_e()
@@ -1,9 +1,19 @@
+from Code.Common.DynamicalSystem import default_figures_dir
+from Code.Common.Export import ResultWriter, closed_loop_columns, default_results_dir, results_path
 from Code.Common.LinearSystem import LinearSystem
 from Code.Common.PidController import PidController as PidCtrl
 import numpy as np
+import os
 
 
-if __name__ == '__main__':
+def good_controller(figures_dir=default_figures_dir, show=True, results_dir=default_results_dir):
+    """
+    Function to plot the position of the linear system under the tuned PID controller
+    :param figures_dir: The directory where the figure will be saved
+    :param show: Boolean to represent if the graph is to be displayed
+    :param results_dir: The directory where the position of the ball at each sample will be saved
+    :return: None
+    """
     applied_voltage = 2.  # Input voltage (volts) applied to the linear system, relative to the equilibrium voltage
     ball_position = 0.1  # Initial position (metres) of the ball relative to the equilibrium point
     set_point = 0.  # Set point (metres) for the ball to tend to, relative to the equilibrium point
@@ -26,7 +36,16 @@ if __name__ == '__main__':
         ball.move(voltage, t_sampling, num_points)  # Move the ball
         x_cache = np.vstack((x_cache, [ball.get_x_1_bar()]))  # Append the ball position to the array
 
+    # Save the position of the ball at each sample
+    with ResultWriter(results_path('pid_controlled_system', results_dir)) as writer:
+        writer.write(closed_loop_columns(t_span, x_cache))
+
     # Plot a graph of x_1_bar (m) against time (s)
     ball.plotter(t_span,
                  x_cache,
-                 file_path='.\\Figures\\pid_controlled_system.svg')
+                 file_path=os.path.join(figures_dir, 'pid_controlled_system.svg'),
+                 show=show)
+
+
+if __name__ == '__main__':
+    good_controller()
@@ -1,9 +1,16 @@
-from Code.Common.DynamicalSystem import DynamicalSystem
+from Code.Common.DynamicalSystem import DynamicalSystem, default_figures_dir
 from Code.Common.LinearSystem import LinearSystem
 from Code.Common.NonlinearSystem import NonlinearSystem
+import os
 
 
-if __name__ == '__main__':
+def linear_vs_nonlinear(figures_dir=default_figures_dir, show=True):
+    """
+    Function to compare the linear and non-linear systems released from a range of distances from equilibrium
+    :param figures_dir: The directory where the figures will be saved
+    :param show: Boolean to represent if the graphs are to be displayed
+    :return: None
+    """
     system = DynamicalSystem()  # Create a dynamical system
 
     # Equilibrium values of x_1, x_2, current, and voltage
@@ -45,13 +52,19 @@ if __name__ == '__main__':
     # Plot graphs of x position against time with initial x position 3.5 cm away from equilibrium
     ball_linear.plotter(linear_x_axes,
                         linear_y_axes,
-                        file_path='.\\Figures\\linear_system.svg',
+                        file_path=os.path.join(figures_dir, 'linear_system.svg'),
                         multiplot=True,
                         labels=labels,
-                        label_title='Starting Distance\nfrom Equilibrium')
+                        label_title='Starting Distance\nfrom Equilibrium',
+                        show=show)
     ball_nonlinear.plotter(nonlinear_x_axes,
                            nonlinear_y_axes,
-                           file_path='.\\Figures\\nonlinear_system.svg',
+                           file_path=os.path.join(figures_dir, 'nonlinear_system.svg'),
                            multiplot=True,
                            labels=labels,
-                           label_title='Starting Distance\nfrom Equilibrium')
+                           label_title='Starting Distance\nfrom Equilibrium',
+                           show=show)
+
+
+if __name__ == '__main__':
+    linear_vs_nonlinear()
@@ -0,0 +1,60 @@
+from Code.Common.DynamicalSystem import default_figures_dir
+from Code.Common.RegionOfAttraction import RegionOfAttraction
+import matplotlib.pyplot as plt
+import os
+
+
+def region_of_attraction(figures_dir=default_figures_dir, show=True, workers=None):
+    """
+    Function to map the region of attraction over the initial position and speed of the ball, with the current
+    starting at equilibrium, for the open-loop system and for the PID controlled system
+    :param figures_dir: The directory where the figures will be saved
+    :param show: Boolean to represent if the graphs are to be displayed
+    :param workers: The number of processes used to simulate the initial states, all cores if None
+    :return: None
+    """
+    systems = {
+        'open_loop': RegionOfAttraction(),  # Equilibrium voltage applied
+        # Same gains as in GoodController.py, which take longer than 2 s to settle from some initial states
+        'pid_controlled': RegionOfAttraction(pid_gains=(70, 5.5, 450), t_final=5.)
+    }
+
+    for name, system in systems.items():
+        x_1_e = system.get_equilibrium()[0]
+        results = system.estimate({'x_1': (x_1_e - 0.2, 0.64), 'x_2': (-2., 2.)}, num_points=9, levels=4,
+                                  workers=workers)
+
+        # Report the limit of the linear system
+        if results['linear_limit'] is not None:
+            print(name + ': the linear system is not trustworthy from x_1 = ' + str(results['linear_limit'][0])
+                  + ' m, x_2 = ' + str(results['linear_limit'][1]) + ' m/s.')
+        else:
+            print(name + ': the linear system is trustworthy over the whole map.')
+
+        # Plot the outcome of every initial state which was simulated, and where the linear system stops being
+        # trustworthy
+        points = results['points']
+        converged = results['converged']
+        diverged = results['diverged']
+        undecided = results['undecided']
+        trust_boundary = results['trust_boundary']
+        plt.scatter(points[converged, 0], points[converged, 1], s=4, c='g', label='Converges')
+        plt.scatter(points[diverged, 0], points[diverged, 1], s=4, c='r', label='Diverges')
+        if undecided.any():
+            plt.scatter(points[undecided, 0], points[undecided, 1], s=4, c='grey', label='Undecided')
+        plt.scatter(trust_boundary[:, 0], trust_boundary[:, 1], s=16, facecolors='none', edgecolors='b',
+                    label='Limit of linear system')
+        plt.axvline(x_1_e, color='k', linestyle='--', label='$x_1^e$')
+        plt.legend()
+        plt.xlabel('Initial $x_1$ (m)')  # Label the x-axis
+        plt.ylabel('Initial $x_2$ (m/s)')  # Label the y-axis
+        plt.grid()  # Produces a grid on the graph
+        plt.savefig(os.path.join(figures_dir, 'region_of_attraction_' + name + '.svg'))  # Save the graph
+        if show:
+            plt.show()  # Displays the graph
+        else:
+            plt.close()  # Closes the graph without displaying it
+
+
+if __name__ == '__main__':
+    region_of_attraction()
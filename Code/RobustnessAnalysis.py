@@ -0,0 +1,26 @@
+from Code.Common.Export import ResultWriter, results_path
+from Code.Common.Robustness import Robustness
+
+
+if __name__ == '__main__':
+    num_units = 10000  # Number of perturbed units to be simulated
+    tolerances = {
+        'mass': 0.05,  # Relative standard deviation of the mass of the ball
+        'k_spring': 0.05,  # Relative standard deviation of the spring constant
+        'resistance': 0.05  # Relative standard deviation of the resistance of the electromagnet
+    }
+
+    # Same PID controller and initial conditions as in GoodController.py
+    analysis = Robustness(kp=70, kd=5.5, ki=450, ball_position=0.1, applied_voltage=2., tolerances=tolerances)
+
+    # Simulate the units in parallel batches, writing the metrics and constants of every unit to disk and summarising
+    # the results as they arrive
+    with ResultWriter(results_path('robustness')) as writer:
+        summary = analysis.summarise(writer.write_stream(analysis.stream(num_units, batch_size=1000, seed=0)))
+
+    print('Simulated ' + str(summary['units']) + ' units.')
+    print('Yield (settled within ±1 mm) is ' + str(100 * summary['yield']) + ' %.')
+    for percentile, overshoot in summary['overshoot'].items():
+        print(str(percentile) + 'th percentile of overshoot is ' + str(overshoot) + ' %.')
+    for percentile, settling_time in summary['settling_time'].items():
+        print(str(percentile) + 'th percentile of settling time is ' + str(settling_time) + ' s.')